@@ -7,21 +7,17 @@ but I chose to stick to python builtins.
 # imports
 import sys
 import argparse
-import unittest
-
-# StringIO import is different between python2.x and python3.x
-try:
-    # python 2.x: StringIO.StringIO
-    from StringIO import StringIO
-except ImportError:
-    # python 3.x: io.StringIO
-    from io import StringIO
+from functools import reduce
+from operator import or_
 
 # set script meta vars
 __author__ = "Ryan Smith (ryan.smith.p@gmail.com)"
 __version__ = "0.1.0"
 __date__ = "2018-06-16"
 
+# size of file reads and output write buffer (1 MiB)
+BUFFER_SIZE = 1 << 20
+
 def get_args(args):
     """Defines the command-line interface"""
     # init parser
@@ -68,61 +64,151 @@ def set_io(args, parser):
             parser.print_help()
             exit(1)
         else:
-            args.input = sys.stdin
-    # otherwise, open input by filename
+            args.input = sys.stdin.buffer
+    # otherwise, open input by filename.
+    #   input is read as bytes to skip decoding every line
     else:
-        args.input = open(args.input, 'r')
+        args.input = open(args.input, 'rb')
     # if no output specified, set to stdout
     if args.output is None:
         args.output = sys.stdout
-    # otherwise, open output by filename
+    # otherwise, open output by filename.
+    #   a large buffer means fewer write syscalls for many small experiments
     else:
-        args.output = open(args.output, 'w')
+        args.output = open(args.output, 'w', buffering=BUFFER_SIZE)
     return
 
+def read_lines(input_file, chunk_size=BUFFER_SIZE):
+    """Generator function. Yields lines of a binary file read in big chunks"""
+    # partial line carried over from the previous chunk
+    tail = b""
+    while True:
+        chunk = input_file.read(chunk_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        # last line is incomplete until the next chunk is read
+        tail = lines.pop()
+        for line in lines:
+            yield line
+
+    # make sure to yield final line (if no newline at end of file)
+    if tail:
+        yield tail
+
+
 def input_parser(input_file):
     """Generator function. Parses muliplexed genotyping experiments file"""
-    # list to collect lines for each experiment
-    experiment = []
+    # maps each sample_id to its bit in this experiment's bitvectors.
+    #   sample_ids can be large and sparse, so bits are handed out in
+    #   order of first appearance rather than by sample_id value.
+    sample_bits = SampleBits()
+    # bitvector of normal sample ids
+    normal_samples = 0
+    # stores each mutant callset bitvector
+    mutant_sample_sets = []
+    # set on any test line, as tests with no samples still make an experiment
+    has_tests = False
     # iterate over lines in file
-    for line in input_file:
+    for line in read_lines(input_file):
         line = line.strip()
-        # as long as line is not empty, append to experiment
-        if line != '':
-            experiment.append(line.split(","))
-        # on empty lines, yield experiment list
+        # as long as line is not empty, fold test into experiment
+        if line:
+            has_tests = True
+            test_set = line.split(b",")
+            # get genotype call from first item
+            state = test_set[0]
+            # all following items are sample_ids
+            test_bits = get_test_bits(test_set[1:], sample_bits)
+            # collect mutant test pools in separate bitvectors
+            if state == b"MUT":
+                mutant_sample_sets.append(test_bits)
+            # collect all normal test ids in a single bitvector
+            elif state == b"NORM":
+                normal_samples |= test_bits
+        # on empty lines, yield experiment bitvectors.
+        #   sample_ids[i] is the sample_id for bit i of the bitvectors
         else:
-            yield experiment
-            experiment = []
+            yield [normal_samples, mutant_sample_sets, list(sample_bits)]
+            sample_bits = SampleBits()
+            normal_samples = 0
+            mutant_sample_sets = []
+            has_tests = False
 
     # make sure to yield final experiment (if no newline at last test)
-    if experiment:
-        yield experiment
+    if has_tests:
+        yield [normal_samples, mutant_sample_sets, list(sample_bits)]
+
 
+class SampleBits(dict):
+    """Maps sample_ids to bits, giving unseen sample_ids the next free bit"""
 
-def filter_mutants(mutant_sample_sets, normal_samples):
-    """Filters any mutant from a test if called in normal tests"""
-    # exclude normal sample_ids from individual mutant test sets
-    return [test_set - normal_samples for test_set in mutant_sample_sets]
+    def __missing__(self, sample_id):
+        """Called on lookup of a sample_id not yet seen in the experiment"""
+        bit = self[sample_id] = 1 << len(self)
+        return bit
 
 
-def get_single_mutants(filtered_mutants):
-    """Returns a set of sample_ids uniquely identified as mutant"""
-    # next(iter(x)) to get the value from a set of len 1
-    #   WITHOUT leaving an empty set behind (with set.pop())
-    return set([next(iter(x)) for x in filtered_mutants if len(x) == 1])
+def get_test_bits(samples, sample_bits):
+    """Returns a bitvector of a test's samples"""
+    # map and reduce run the whole fold in C, with no python-level loop.
+    #   repeated sample_ids are harmless, as x | x == x.
+    return reduce(or_, map(sample_bits.__getitem__, samples), 0)
 
 
-def check_unique(filtered_mutants, single_mutants):
+# int.bit_count is python 3.10+, so fall back to counting binary digits
+try:
+    popcount = int.bit_count
+except AttributeError:
+    def popcount(bits):
+        """Returns the number of set bits in a bitvector"""
+        return bin(bits).count("1")
+
+
+def iter_bits(bits):
+    """Generator function. Yields the index of each set bit, lowest first"""
+    while bits:
+        # isolate the lowest set bit
+        bit = bits & -bits
+        yield bit.bit_length() - 1
+        # and clear it for the next iteration
+        bits ^= bit
+
+
+def filter_mutants(mutant_sample_sets, normal_samples, all_samples):
+    """Filters normal samples from mutant tests, collecting single mutants"""
+    # complement the normal bitvector once, not once per test.
+    #   xor with all_samples keeps it positive and only as wide as the
+    #   experiment, where ~ makes a negative int that & must re-complement
+    not_normal = all_samples ^ normal_samples
+    # list to collect filtered mutant test bitvectors
+    filtered_mutants = []
+    # bitvector of samples uniquely identified as mutant
+    single_mutants = 0
+    for test_set in mutant_sample_sets:
+        # clear normal sample bits from the mutant test bitvector
+        test_set &= not_normal
+        # x & (x - 1) clears the lowest bit, so it is 0 for a single sample
+        #   (empty tests also pass, but add nothing to the bitvector)
+        if not test_set & (test_set - 1):
+            single_mutants |= test_set
+        filtered_mutants.append(test_set)
+    return filtered_mutants, single_mutants
+
+
+def check_unique(filtered_mutants, single_mutants, all_samples):
     """Returns FALSE if any mutant samples were not uniquely identified"""
+    # complement the single mutant bitvector once, not once per test,
+    #   keeping it positive with all_samples as in filter_mutants
+    not_single = all_samples ^ single_mutants
     # for each normal-filtered mutant test pool,
     #   remove any samples that were uniquely identified.
     #   if multiple samples still remain, they cannot be uniquely identified.
     # could report the ambiguous sample_ids and call the successful samples,
     #    but the instructions say that ALL samples must be mapped uniquely.
     for test_set in filtered_mutants:
-        test_set = test_set - single_mutants
-        if len(test_set) > 1:
+        test_set &= not_single
+        if test_set & (test_set - 1):
             return False
     # return true if check passes
     return True
@@ -133,293 +219,73 @@ def check_consistent(filtered_mutants):
     # if any mutant test gets filtered to 0 elements,
     #   all of these test samples were identified in normal tests
     #   this can only happen with an erroneous NORMAL or MUTANT genotype call.
-    for test_set in filtered_mutants:
-        if len(test_set) == 0:
-            # return False flag for failure
-            return False
-
-    # return true if check passes
-    return True
+    # list containment scans for an empty bitvector in C, no python loop
+    return 0 not in filtered_mutants
 
 
 def process_experiment(experiment):
     """Evaluates a single multiplexing experiment"""
-    # stores normal sample ids
-    normal_samples = set()
-    # stores each mutant callset
-    mutant_sample_sets = []
-    # for each test pool,
-    for test_set in experiment:
-        # get genotype call from first item
-        state = test_set[0]
-        # all following items are sample_ids
-        samples = test_set[1:]
-        # collect mutant test pools in separate sets
-        if state == "MUT":
-            mutant_sample_sets.append(set(samples))
-        # collect all normal test ids in a single set
-        elif state == "NORM":
-            normal_samples.update(samples)
-    # for each mutant test set, remove samples found in normal pools
-    filtered_mutants = filter_mutants(mutant_sample_sets, normal_samples)
-    # get MUT tests that were narrowed down to a single mutant
-    single_mutants = get_single_mutants(filtered_mutants)
-    # check for uniqueness
-    if not check_unique(filtered_mutants, single_mutants):
+    # unpack the bitvectors folded by input_parser
+    normal_samples, mutant_sample_sets, sample_ids = experiment
+    # bits are handed out densely from 0, so every sample in the
+    #   experiment is covered by a mask of the lowest len(sample_ids) bits
+    all_samples = (1 << len(sample_ids)) - 1
+    # for each mutant test set, remove samples found in normal pools,
+    #   getting MUT tests narrowed down to a single mutant in the same pass
+    filtered_mutants, single_mutants = filter_mutants(
+        mutant_sample_sets, normal_samples, all_samples
+    )
+    # check for uniqueness.
+    #   this takes precedence over consistency, so an empty filtered test
+    #   cannot end evaluation before all single mutants are known
+    if not check_unique(filtered_mutants, single_mutants, all_samples):
         return False, "NONUNIQUE"
     # check for consistency
     if not check_consistent(filtered_mutants):
         return False, "INCONSISTENT"
     # return True flag for success as well as the results
-    return True, [single_mutants, normal_samples]
+    return True, [single_mutants, normal_samples, sample_ids]
 
 
 def output_results(success, result, output_file):
     """Writes the results of a genotyping experiment to output"""
-    # write failure state if experiment failed
+    # write failure state if experiment failed,
+    #   newline delimits each experiment
     if not success:
-        output_file.write(result+"\n")
+        output_file.write(f"{result}\n\n")
     elif success:
-        # unpack results sets if success
-        single_mutants, normal_samples = result
+        # unpack results bitvectors if success
+        single_mutants, normal_samples, sample_ids = result
         # list to store all calls
         final_calls = []
         # get mutant and normal counts
-        n_mut = len(single_mutants)
-        n_norm = len(normal_samples)
-        # append sample_ids with genotype call to final_calls
-        for sample_id in single_mutants:
-            final_calls.append((sample_id, "MUT"))
-        for sample_id in normal_samples:
-            final_calls.append((sample_id, "NORM"))
-
-        # sort final_calls by sample_ids
-        final_calls.sort(key=lambda x: int(x[0]))
-        # write totals to output
-        output_file.write("MUT COUNT: {0}\n".format(n_mut))
-        output_file.write("NORM COUNT: {0}\n".format(n_norm))
-        # write sample calls to output
-        for line in final_calls:
-            output_file.write(",".join(line)+"\n")
-
-    # newline delimits each experiment
-    output_file.write("\n")
-    return
-
-
-class TestArgs(unittest.TestCase):
-    """Class for defining unit tests"""
-
-    def test_get_args_testflag(self):
-        """TEST get_args test FUNCTIONALITY"""
-        # test flag
-        args = get_args(["-t"])[0]
-        self.assertTrue(args.test)
-
-    def test_get_args_input(self):
-        """TEST get_args input FUNCTIONALITY"""
-        # only define input file
-        args = get_args(["-i", "input"])[0]
-        self.assertEqual(args.input, "input")
-        self.assertEqual(args.output, None)
-
-    def test_get_args_output(self):
-        """TEST get_args output FUNCTIONALITY"""
-        # only define output file
-        args = get_args(["-o", "output"])[0]
-        self.assertEqual(args.input, None)
-        self.assertEqual(args.output, "output")
-
-    def test_get_args_input_output(self):
-        """TEST get_args input output FUNCTIONALITY"""
-        # define both
-        args = get_args(["-i", "input", "-o", "output"])[0]
-        self.assertEqual(args.input, "input")
-        self.assertEqual(args.output, "output")
-
-    def test_get_args_no_args(self):
-        """TEST get_args no args FUNCTIONALITY"""
-        # define none
-        args = get_args([])[0]
-        self.assertEqual(args.input, None)
-        self.assertEqual(args.output, None)
-
-class TestUtilities(unittest.TestCase):
-    """Class for defining utilities tests"""
-
-    def setUp(self):
-        """Init test module"""
-        # expected filtered mutant sets for each test
-        self.test_filtered_mutants = [
-            [],
-            [set(['12'])],
-            [set([])],
-            [set(['1', '0']), set(['1', '2'])]
-        ]
-
-        # mutant and normal sets for each test
-        self.test_sample_sets = [
-            [[], set(['1', '0', '2'])],
-            [[set(['12', '110'])], set(['100', '110'])],
-            [[set(['1', '2'])], set(['1', '0', '3', '2'])],
-            [[set(['1', '0']), set(['1', '2'])], set([])]
-        ]
-
-        #single mutant sets for each test
-        self.test_single_mutants = [set([]), set(['12']), set([]), set([])]
-        # unique check result for each test
-        self.test_uniques = [True, True, True, False]
-        # consistency check result for each test
-        self.test_consistents = [True, True, False, True]
-        # test command line args
-
-    def test_filter_mutants(self):
-        """TEST filter_mutants FUNCTIONALITY"""
-        # list to collect filtered mutants
-        filtered_mutants = []
-        # call filter_mutants on each test sample set
-        for mutant_sample_sets, normal_samples in self.test_sample_sets:
-            filtered_mutants.append(
-                # sample_set is [mutant_sample_sets, normal_samples]
-                filter_mutants(mutant_sample_sets, normal_samples)
-            )
-        # compare results to test_filtered_mutants
-        self.assertEqual(filtered_mutants, self.test_filtered_mutants)
-
-    def test_get_single_mutants(self):
-        """TEST get_single_mutants FUNCTIONALITY"""
-        # list to collect single mutants
-        single_mutants = []
-        # call get_single_mutants for
-        for filtered_mutants in self.test_filtered_mutants:
-            single_mutants.append(get_single_mutants(filtered_mutants))
-        # compare results to test_single_mutants
-        self.assertEqual(single_mutants, self.test_single_mutants)
-
-    def test_check_unique(self):
-        """TEST check_unique FUNCTIONALITY"""
-        # list to collect unique mutants
-        uniques = []
-        # zip inputs together for looping
-        test_input = zip(self.test_filtered_mutants, self.test_single_mutants)
-        # call check_unique on each test input set
-        for filtered_mutants, single_mutants in test_input:
-            uniques.append(check_unique(filtered_mutants, single_mutants))
-        # compare results to test_uniques
-        self.assertEqual(uniques, self.test_uniques)
-
-    def test_check_consistent(self):
-        """TEST check_consistent FUNCTIONALITY"""
-        # list collect consistency check output
-        consistents = []
-        # call check_consistent for each test
-        for filtered_mutants in self.test_filtered_mutants:
-            consistents.append(check_consistent(filtered_mutants))
-        # compare results to test_consistentss
-        self.assertEqual(consistents, self.test_consistents)
-
-# TEST SUITE #
-class TestGenotype(unittest.TestCase):
-    """Class for defining higher-level genotyping functions"""
-
-    def setUp(self):
-        """Init test module"""
-        # simulate input file for testing
-        self.test_input_file = StringIO((
-            "NORM,0,1\n"
-            "NORM,1,2\n"
-            "NORM,0,2\n"
-            "\n"
-            "NORM,100,110\n"
-            "MUT,110,12\n"
-            "\n"
-            "NORM,0,1\n"
-            "MUT,1,2\n"
-            "NORM,1,3\n"
-            "NORM,2,3\n"
-            "\n"
-            "MUT,0,1\n"
-            "MUT,1,2\n"
-            "\n"
-            ))
-
-        # expected output from test input
-        self.test_experiments = [
-            [
-                ["NORM", "0", "1"],
-                ["NORM", "1", "2"],
-                ["NORM", "0", "2"]
-            ],
-            [
-                ["NORM", "100", "110"],
-                ["MUT", "110", "12"]
-            ],
-            [
-                ["NORM", "0", "1"],
-                ["MUT", "1", "2"],
-                ["NORM", "1", "3"],
-                ["NORM", "2", "3"]
-            ],
-            [
-                ["MUT", "0", "1"],
-                ["MUT", "1", "2"]
-            ]
+        n_mut = popcount(single_mutants)
+        n_norm = popcount(normal_samples)
+        # append sample_ids with genotype call to final_calls,
+        #   led by the integer sample_id to sort on.
+        #   (sample_ids are read as bytes, so decode for output)
+        for index in iter_bits(single_mutants):
+            sample_id = sample_ids[index]
+            final_calls.append((int(sample_id), sample_id.decode(), "MUT"))
+        for index in iter_bits(normal_samples):
+            sample_id = sample_ids[index]
+            final_calls.append((int(sample_id), sample_id.decode(), "NORM"))
+
+        # sort final_calls by sample_ids, comparing tuples in C
+        final_calls.sort()
+        # list to collect output lines, starting with totals
+        lines = [
+            f"MUT COUNT: {n_mut}\n",
+            f"NORM COUNT: {n_norm}\n"
         ]
-
-        # expected output of process_experiment for each test
-        self.test_results = [
-            (True, [set([]), set(['1', '0', '2'])]),
-            (True, [set(['12']), set(['100', '110'])]),
-            (False, 'INCONSISTENT'),
-            (False, 'NONUNIQUE')
-        ]
-
-        # expected final output for testing
-        self.test_output = (
-            "MUT COUNT: 0\n"
-            "NORM COUNT: 3\n"
-            "0,NORM\n"
-            "1,NORM\n"
-            "2,NORM\n"
-            "\n"
-            "MUT COUNT: 1\n"
-            "NORM COUNT: 2\n"
-            "12,MUT\n"
-            "100,NORM\n"
-            "110,NORM\n"
-            "\n"
-            "INCONSISTENT\n"
-            "\n"
-            "NONUNIQUE\n"
-            "\n"
-        )
-
-    def test_input_parser(self):
-        """TEST input_parser FUNCTIONALITY"""
-        # get all experiments from simulated input
-        experiments = [x for x in input_parser(self.test_input_file)]
-        # compare results to test_experiments
-        self.assertEqual(experiments, self.test_experiments)
-
-    def test_process_experiment(self):
-        """TEST process_experiment FUNCTIONALITY"""
-        # collect results for each test experiment
-        results = []
-        # call process_experiments for each test
-        for experiment in self.test_experiments:
-            results.append(process_experiment(experiment))
-        # compare results to test_results
-        self.assertEqual(results, self.test_results)
-
-    def test_output_results(self):
-        """TEST output_results FUNCTIONALITY"""
-        # get StringIO simulated output file
-        output_file = StringIO()
-        # write results to StringIO
-        for success, result in self.test_results:
-            output_results(success, result, output_file)
-        # compare output to test_output
-        self.assertEqual(output_file.getvalue(), self.test_output)
+        # add sample calls
+        for _, sample_id, call in final_calls:
+            lines.append(f"{sample_id},{call}\n")
+        # newline delimits each experiment
+        lines.append("\n")
+        # write the whole experiment to output in one call
+        output_file.write("".join(lines))
+    return
 
 
 def main():
@@ -428,18 +294,31 @@ def main():
     args, parser = get_args(sys.argv[1:])
     # if test flag, run tests
     if args.test:
-        # with tests in same file, unittest.main() still gets sys.argv
+        # unittest and the tests are only imported here, so normal runs
+        #   skip their import time
+        import unittest
+        # unittest.main() still gets sys.argv
         # so, clear sys.argv before running unittest
         sys.argv = sys.argv[:1]
-        unittest.main()
+        unittest.main(module="test_genotype")
     # open file handles
     set_io(args, parser)
-    # iterate over each experiment from input file using reader
-    for experiment in input_parser(args.input):
-        # get success flag and results
-        success, results = process_experiment(experiment)
-        # write the results to output
-        output_results(success, results, args.output)
+    try:
+        # iterate over each experiment from input file using reader
+        for experiment in input_parser(args.input):
+            # get success flag and results
+            success, results = process_experiment(experiment)
+            # write the results to output
+            output_results(success, results, args.output)
+    finally:
+        # close file handles opened by set_io,
+        #   but only flush the process-wide std streams
+        if args.input is not sys.stdin.buffer:
+            args.input.close()
+        if args.output is sys.stdout:
+            args.output.flush()
+        else:
+            args.output.close()
 
 
 if __name__ == '__main__':
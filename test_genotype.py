@@ -0,0 +1,275 @@
+"""
+Unit tests for the multiplex genotyping script.
+Run with: genotype.py --test
+"""
+# imports
+import unittest
+from io import BytesIO, StringIO
+
+from genotype import (
+    get_args, read_lines, input_parser, SampleBits, get_test_bits,
+    popcount, iter_bits, filter_mutants, check_unique, check_consistent,
+    process_experiment, output_results
+)
+
+
+class TestArgs(unittest.TestCase):
+    """Class for defining unit tests"""
+
+    def test_get_args_testflag(self):
+        """TEST get_args test FUNCTIONALITY"""
+        # test flag
+        args = get_args(["-t"])[0]
+        self.assertTrue(args.test)
+
+    def test_get_args_input(self):
+        """TEST get_args input FUNCTIONALITY"""
+        # only define input file
+        args = get_args(["-i", "input"])[0]
+        self.assertEqual(args.input, "input")
+        self.assertEqual(args.output, None)
+
+    def test_get_args_output(self):
+        """TEST get_args output FUNCTIONALITY"""
+        # only define output file
+        args = get_args(["-o", "output"])[0]
+        self.assertEqual(args.input, None)
+        self.assertEqual(args.output, "output")
+
+    def test_get_args_input_output(self):
+        """TEST get_args input output FUNCTIONALITY"""
+        # define both
+        args = get_args(["-i", "input", "-o", "output"])[0]
+        self.assertEqual(args.input, "input")
+        self.assertEqual(args.output, "output")
+
+    def test_get_args_no_args(self):
+        """TEST get_args no args FUNCTIONALITY"""
+        # define none
+        args = get_args([])[0]
+        self.assertEqual(args.input, None)
+        self.assertEqual(args.output, None)
+
+class TestUtilities(unittest.TestCase):
+    """Class for defining utilities tests"""
+
+    def setUp(self):
+        """Init test module"""
+        # expected filtered mutant bitvectors for each test
+        self.test_filtered_mutants = [
+            [],
+            [0b001],
+            [0b0000],
+            [0b011, 0b110]
+        ]
+
+        # mutant, normal and all sample bitvectors for each test
+        self.test_sample_sets = [
+            # bits: 1, 0, 2
+            [[], 0b111, 0b111],
+            # bits: 12, 110, 100
+            [[0b011], 0b110, 0b111],
+            # bits: 1, 2, 0, 3
+            [[0b0011], 0b1111, 0b1111],
+            # bits: 0, 1, 2
+            [[0b011, 0b110], 0b000, 0b111]
+        ]
+
+        #single mutant bitvectors for each test
+        self.test_single_mutants = [0b000, 0b001, 0b0000, 0b000]
+        # unique check result for each test
+        self.test_uniques = [True, True, True, False]
+        # consistency check result for each test
+        self.test_consistents = [True, True, False, True]
+        # test command line args
+
+    def test_get_test_bits(self):
+        """TEST get_test_bits FUNCTIONALITY"""
+        # sample_id to bit mapping shared across tests
+        sample_bits = SampleBits()
+        # new sample_ids get the next bit, duplicates are ignored
+        test_bits = [
+            get_test_bits(["12", "110"], sample_bits),
+            get_test_bits(["110", "100", "110"], sample_bits),
+            get_test_bits([], sample_bits)
+        ]
+        self.assertEqual(test_bits, [0b011, 0b110, 0b000])
+        # compare mapping to order of first appearance
+        self.assertEqual(sample_bits, {"12": 1, "110": 2, "100": 4})
+
+    def test_iter_bits(self):
+        """TEST iter_bits FUNCTIONALITY"""
+        # set bit indices come back in ascending order
+        self.assertEqual(list(iter_bits(0b101001)), [0, 3, 5])
+        self.assertEqual(list(iter_bits(1 << 100)), [100])
+        self.assertEqual(list(iter_bits(0)), [])
+
+    def test_popcount(self):
+        """TEST popcount FUNCTIONALITY"""
+        # count set bits of each test bitvector
+        counts = [popcount(x) for x in [0, 0b101001, (1 << 100) - 1]]
+        self.assertEqual(counts, [0, 3, 100])
+
+    def test_filter_mutants(self):
+        """TEST filter_mutants FUNCTIONALITY"""
+        # list to collect filtered mutants and single mutants
+        results = []
+        # call filter_mutants on each test sample set
+        for sample_set in self.test_sample_sets:
+            results.append(
+                # sample_set is [mutant_sample_sets, normal_samples,
+                #   all_samples]
+                filter_mutants(*sample_set)
+            )
+        # compare results to test_filtered_mutants and test_single_mutants
+        test_results = zip(
+            self.test_filtered_mutants, self.test_single_mutants
+        )
+        self.assertEqual(results, list(test_results))
+
+    def test_check_unique(self):
+        """TEST check_unique FUNCTIONALITY"""
+        # list to collect unique mutants
+        uniques = []
+        # zip inputs together for looping
+        test_input = zip(
+            self.test_filtered_mutants,
+            self.test_single_mutants,
+            [sample_set[2] for sample_set in self.test_sample_sets]
+        )
+        # call check_unique on each test input set
+        for filtered_mutants, single_mutants, all_samples in test_input:
+            uniques.append(
+                check_unique(filtered_mutants, single_mutants, all_samples)
+            )
+        # compare results to test_uniques
+        self.assertEqual(uniques, self.test_uniques)
+
+    def test_check_consistent(self):
+        """TEST check_consistent FUNCTIONALITY"""
+        # list collect consistency check output
+        consistents = []
+        # call check_consistent for each test
+        for filtered_mutants in self.test_filtered_mutants:
+            consistents.append(check_consistent(filtered_mutants))
+        # compare results to test_consistentss
+        self.assertEqual(consistents, self.test_consistents)
+
+# TEST SUITE #
+class TestGenotype(unittest.TestCase):
+    """Class for defining higher-level genotyping functions"""
+
+    def setUp(self):
+        """Init test module"""
+        # simulate input file for testing
+        self.test_input_file = BytesIO((
+            b"NORM,0,1\n"
+            b"NORM,1,2\n"
+            b"NORM,0,2\n"
+            b"\n"
+            b"NORM,100,110\n"
+            b"MUT,110,12\n"
+            b"\n"
+            b"NORM,0,1\n"
+            b"MUT,1,2\n"
+            b"NORM,1,3\n"
+            b"NORM,2,3\n"
+            b"\n"
+            b"MUT,0,1\n"
+            b"MUT,1,2\n"
+            b"\n"
+            ))
+
+        # expected output from test input
+        #   (normal bitvector, mutant bitvectors, sample_id of each bit)
+        self.test_experiments = [
+            [0b111, [], [b"0", b"1", b"2"]],
+            [0b011, [0b110], [b"100", b"110", b"12"]],
+            [0b1111, [0b0110], [b"0", b"1", b"2", b"3"]],
+            [0b000, [0b011, 0b110], [b"0", b"1", b"2"]]
+        ]
+
+        # expected output of process_experiment for each test
+        self.test_results = [
+            (True, [0b000, 0b111, [b'0', b'1', b'2']]),
+            (True, [0b100, 0b011, [b'100', b'110', b'12']]),
+            (False, 'INCONSISTENT'),
+            (False, 'NONUNIQUE')
+        ]
+
+        # expected final output for testing
+        self.test_output = (
+            "MUT COUNT: 0\n"
+            "NORM COUNT: 3\n"
+            "0,NORM\n"
+            "1,NORM\n"
+            "2,NORM\n"
+            "\n"
+            "MUT COUNT: 1\n"
+            "NORM COUNT: 2\n"
+            "12,MUT\n"
+            "100,NORM\n"
+            "110,NORM\n"
+            "\n"
+            "INCONSISTENT\n"
+            "\n"
+            "NONUNIQUE\n"
+            "\n"
+        )
+
+    def test_read_lines(self):
+        """TEST read_lines FUNCTIONALITY"""
+        # small chunks split lines, which must be carried to the next read
+        lines = [x for x in read_lines(self.test_input_file, chunk_size=4)]
+        # compare results to lines of the simulated input
+        test_lines = self.test_input_file.getvalue().split(b"\n")[:-1]
+        self.assertEqual(lines, test_lines)
+
+    def test_input_parser(self):
+        """TEST input_parser FUNCTIONALITY"""
+        # get all experiments from simulated input
+        experiments = [x for x in input_parser(self.test_input_file)]
+        # compare results to test_experiments
+        self.assertEqual(experiments, self.test_experiments)
+
+    def test_input_parser_no_samples(self):
+        """TEST input_parser final experiment without samples"""
+        # last experiment has no sample_ids and no trailing newline
+        input_file = BytesIO(b"NORM,0\n\nMUT\nNORM")
+        experiments = [x for x in input_parser(input_file)]
+        # compare results to both experiments
+        self.assertEqual(experiments, [[0b1, [], [b"0"]], [0, [0], []]])
+
+    def test_process_experiment(self):
+        """TEST process_experiment FUNCTIONALITY"""
+        # collect results for each test experiment
+        results = []
+        # call process_experiments for each test
+        for experiment in self.test_experiments:
+            results.append(process_experiment(experiment))
+        # compare results to test_results
+        self.assertEqual(results, self.test_results)
+
+    def test_process_experiment_disjoint(self):
+        """TEST process_experiment single mutants are never normal"""
+        # single mutants come from normal-filtered tests, so the two
+        #   result bitvectors never share a sample
+        for experiment in self.test_experiments:
+            success, result = process_experiment(experiment)
+            if success:
+                single_mutants, normal_samples = result[:2]
+                self.assertEqual(single_mutants & normal_samples, 0)
+
+    def test_output_results(self):
+        """TEST output_results FUNCTIONALITY"""
+        # get StringIO simulated output file
+        output_file = StringIO()
+        # write results to StringIO
+        for success, result in self.test_results:
+            output_results(success, result, output_file)
+        # compare output to test_output
+        self.assertEqual(output_file.getvalue(), self.test_output)
+
+
+if __name__ == '__main__':
+    unittest.main()